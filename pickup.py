@@ -3,7 +3,6 @@ import re
 import matplotlib
 import streamlit as st
 import pandas as pd
-import sqlite3
 import matplotlib.pyplot as plt
 import seaborn as sns
 import plotly.express as px
@@ -13,53 +12,14 @@ import plotly.graph_objects as go
 import plotly.subplots as sp
 from datetime import datetime
 
+import pickup_service
+
 st.set_option('deprecation.showPyplotGlobalUse', False)
 # matplotlib.use('TkAgg')
-# Connect to SQLite database
-conn = sqlite3.connect('pickup_laundary_data.db')
+# Connect to SQLite database and create the tables if they don't exist
+conn = pickup_service.connect()
 c = conn.cursor()
 
-# Create pickup_data table if it doesn't exist
-c.execute('''CREATE TABLE IF NOT EXISTS pickup_laundary_data (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                Name TEXT,
-                Phone TEXT,
-                Email TEXT,
-                Pickup_Date TEXT,
-                Pickup_Time TEXT,
-                Status TEXT,
-                Address TEXT,
-                City TEXT,
-                Postal_Code TEXT
-            )''')
-
-c.execute('''CREATE TABLE IF NOT EXISTS order_items (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                Pickup_ID INTEGER,
-                Item_Name TEXT,
-                Item_Price REAL,
-                FOREIGN KEY (Pickup_ID) REFERENCES pickup_laundary_data (id) ON DELETE CASCADE
-            )''')
-
-# Create the users table with the updated schema
-c.execute('''CREATE TABLE IF NOT EXISTS  users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                Username TEXT,
-                Password TEXT,
-                Email TEXT,
-                Date TEXT
-            )''')
-
-# Create ledger table if it doesn't exist
-c.execute('''CREATE TABLE IF NOT EXISTS ledger (
-                ID INTEGER PRIMARY KEY AUTOINCREMENT,
-                Customer_ID INTEGER,
-                Date TEXT,
-                Description TEXT,
-                Amount REAL,
-                FOREIGN KEY (Customer_ID) REFERENCES pickup_laundary_data (id) ON DELETE CASCADE
-            )''')
-
 # CSS styles
 st.markdown(
     """
@@ -396,9 +356,8 @@ def show_customer_ledger():
     if add_ledger_button:
         if selected_customer and date and description and amount:
             # Insert the new ledger entry into the database
-            c.execute("INSERT INTO ledger (Customer_ID, Date, Description, Amount) VALUES (?, ?, ?, ?)",
-                      (customer_data.loc[customer_data['Name'] == selected_customer, 'ID'].values[0], date, description,
-                       amount))
+            pickup_service.add_ledger_entry(c, int(customer_data.loc[customer_data['Name'] == selected_customer,
+                                                                     'ID'].values[0]), date, description, amount)
             conn.commit()
             st.success('Ledger entry added successfully!')
         else:
@@ -438,7 +397,7 @@ def show_admin_dashboard():
     email = st.text_input('Email')
     pickup_date = st.date_input('Pickup Date')
     pickup_time = st.time_input('Pickup Time')
-    status = st.selectbox('Status', ['Pending', 'Completed'])
+    status = st.selectbox('Status', pickup_service.STATUSES)
     address = st.text_input('Address')
     city = st.text_input('City')
     postal_code = st.text_input('Postal Code')
@@ -454,24 +413,10 @@ def show_admin_dashboard():
         # Convert pickup_time to string in 'HH:MM:SS' format
         pickup_time_str = pickup_time.strftime('%H:%M:%S')
 
-        # Insert pickup data into the database
-        c.execute(
-            "INSERT INTO pickup_laundary_data (Name, Phone, Email, Pickup_Date, Pickup_Time, Status, Address, City, Postal_Code) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
-            (name, phone, email, pickup_date_str, pickup_time_str, status, address, city, postal_code))
-        conn.commit()
-
-        # Retrieve the ID of the inserted pickup data
-        pickup_id = c.lastrowid
-
-        # Insert item data into the database
-        item_names_list = item_names.split(',')
-        item_prices_list = item_prices.split(',')
-        for item_name, item_price in zip(item_names_list, item_prices_list):
-            c.execute("INSERT INTO order_items (Pickup_ID, Item_Name,Item_Price) VALUES (?, ?,?)",
-                      (pickup_id, item_name.strip(), item_price.strip()))
-
-            conn.commit()
-
+        # Insert pickup data and its items into the database
+        pickup_id = pickup_service.create_pickup(c, name, phone, email, pickup_date_str, pickup_time_str, status,
+                                                 address, city, postal_code)
+        pickup_service.add_items(c, pickup_id, pickup_service.parse_items(item_names, item_prices))
         conn.commit()
 
         st.success('Pickup data added successfully!')
@@ -502,7 +447,7 @@ def show_admin_dashboard():
             st.warning("Please enter an Order ID.")
 
     # Filter by status
-    status_filter = st.selectbox('Filter by Status', ['All', 'Pending', 'Completed'])  # Filter by status
+    status_filter = st.selectbox('Filter by Status', ['All'] + pickup_service.STATUSES)  # Filter by status
     if status_filter == 'All':
         c.execute(
             "SELECT pickup_laundary_data.*, order_items.Item_Name, order_items.Item_Price FROM pickup_laundary_data LEFT JOIN order_items ON pickup_laundary_data.id = order_items.Pickup_ID"
@@ -544,12 +489,8 @@ def show_admin_dashboard():
     # Handle update button click event
     if update_button:
         if selected_order_id:
-            # Check if the order ID is valid and the status is not already "Completed"
-            selected_order_status = admin_data.loc[admin_data['ID'] == int(selected_order_id), 'Status'].values
-
-            if len(selected_order_status) > 0 and selected_order_status[0] != "Completed":
-                # Update the status to "Completed" in the database
-                c.execute("UPDATE pickup_laundary_data SET Status=? WHERE ID=?", ("Completed", selected_order_id))
+            # Update the status to "Completed" unless the order is missing or already completed
+            if pickup_service.update_status(c, selected_order_id, "Completed"):
                 conn.commit()
                 st.success('Pickup status updated to "Completed".')
             else:
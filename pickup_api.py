@@ -0,0 +1,325 @@
+import argparse
+import asyncio
+import json
+import logging
+import re
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+import pickup_service
+
+# Largest request body accepted, in bytes
+MAX_BODY_SIZE = 64 * 1024
+
+# Most queued writes committed in a single transaction
+MAX_BATCH_SIZE = 512
+
+# Most writes waiting for a batch before new requests are refused with a 503
+MAX_QUEUE_SIZE = 4 * MAX_BATCH_SIZE
+
+ITEMS_ROUTE = re.compile(r'^/pickups/(\d+)/items$')
+STATUS_ROUTE = re.compile(r'^/pickups/(\d+)/status$')
+
+
+class NotFound(Exception):
+    pass
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+# Batched writer
+#
+# Every write request is queued as a function of a cursor. A single task
+# drains whatever has queued up while the previous batch was being written
+# and runs it in one transaction on a dedicated thread, so a burst of
+# concurrent orders costs one commit instead of one per order. Each write
+# gets its own savepoint, so a failing request does not roll back the rest
+# of its batch. The queue is bounded so that under overload requests are
+# refused straight away instead of piling up in memory.
+class BatchWriter:
+    def __init__(self, db_path, max_batch_size=MAX_BATCH_SIZE, max_queue_size=MAX_QUEUE_SIZE):
+        self.db_path = db_path
+        self.max_batch_size = max_batch_size
+        self.queue = asyncio.Queue(maxsize=max_queue_size)
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.conn = None
+        self.task = None
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self.conn = await loop.run_in_executor(self.executor, self._connect)
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self.conn.close)
+        self.executor.shutdown()
+
+    def _connect(self):
+        conn = pickup_service.connect(self.db_path, check_same_thread=False)
+        # Transactions are managed explicitly in _write_batch
+        conn.isolation_level = None
+        return conn
+
+    async def submit(self, operation):
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((operation, future))
+        except asyncio.QueueFull:
+            raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, 'Too many pending orders, please retry.') from None
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.max_batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            operations = [operation for operation, _ in batch]
+            try:
+                outcomes = await loop.run_in_executor(self.executor, self._write_batch, operations)
+            except sqlite3.Error:
+                # The batch as a whole could not be written, usually because
+                # another connection held the write lock; retrying can succeed
+                outcomes = [(None, HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, 'Database unavailable, please retry.'))
+                            for _ in batch]
+            except Exception as error:
+                outcomes = [(None, error)] * len(batch)
+
+            for (_, future), (result, error) in zip(batch, outcomes):
+                if future.done():
+                    continue
+                if error is None:
+                    future.set_result(result)
+                else:
+                    future.set_exception(error)
+
+    def _write_batch(self, operations):
+        c = self.conn.cursor()
+        outcomes = []
+        c.execute('BEGIN IMMEDIATE')
+        try:
+            for operation in operations:
+                c.execute('SAVEPOINT request')
+                try:
+                    outcomes.append((operation(c), None))
+                except Exception as error:
+                    c.execute('ROLLBACK TO request')
+                    outcomes.append((None, error))
+                c.execute('RELEASE request')
+            c.execute('COMMIT')
+        except BaseException:
+            if self.conn.in_transaction:
+                c.execute('ROLLBACK')
+            raise
+        return outcomes
+
+
+# Write operations run inside a batch
+
+def create_pickup_operation(pickup, items):
+    def operation(c):
+        pickup_id = pickup_service.create_pickup(c, **pickup)
+        pickup_service.add_items(c, pickup_id, items)
+        return {'id': pickup_id}
+    return operation
+
+
+def add_items_operation(pickup_id, items):
+    def operation(c):
+        if not pickup_service.pickup_exists(c, pickup_id):
+            raise NotFound('Pickup not found.')
+        pickup_service.add_items(c, pickup_id, items)
+        return {'id': pickup_id, 'items_added': len(items)}
+    return operation
+
+
+def add_ledger_entry_operation(entry):
+    def operation(c):
+        if not pickup_service.pickup_exists(c, entry['customer_id']):
+            raise NotFound('Customer not found.')
+        return {'id': pickup_service.add_ledger_entry(c, **entry)}
+    return operation
+
+
+def update_status_operation(pickup_id, status):
+    def operation(c):
+        if not pickup_service.pickup_exists(c, pickup_id):
+            raise NotFound('Pickup not found.')
+        return {'id': pickup_id, 'status': status,
+                'updated': pickup_service.update_status(c, pickup_id, status)}
+    return operation
+
+
+# Request handling
+
+def route_id(match):
+    # IDs beyond SQLite's integer range cannot exist
+    pickup_id = int(match.group(1))
+    if pickup_id > pickup_service.MAX_ID:
+        raise NotFound('Pickup not found.')
+    return pickup_id
+
+
+async def dispatch(writer, method, path, payload):
+    if path == '/pickups':
+        if method != 'POST':
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, 'Use POST.')
+        pickup = pickup_service.validate_pickup(payload)
+        items = pickup_service.validate_items(payload, required=False)
+        return HTTPStatus.CREATED, await writer.submit(create_pickup_operation(pickup, items))
+
+    match = ITEMS_ROUTE.match(path)
+    if match:
+        if method != 'POST':
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, 'Use POST.')
+        items = pickup_service.validate_items(payload)
+        return HTTPStatus.CREATED, await writer.submit(add_items_operation(route_id(match), items))
+
+    if path == '/ledger':
+        if method != 'POST':
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, 'Use POST.')
+        entry = pickup_service.validate_ledger_entry(payload)
+        return HTTPStatus.CREATED, await writer.submit(add_ledger_entry_operation(entry))
+
+    match = STATUS_ROUTE.match(path)
+    if match:
+        if method not in ('PUT', 'PATCH'):
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, 'Use PUT or PATCH.')
+        status = pickup_service.validate_status(payload)
+        return HTTPStatus.OK, await writer.submit(update_status_operation(route_id(match), status))
+
+    raise HTTPError(HTTPStatus.NOT_FOUND, 'Unknown endpoint.')
+
+
+async def read_request(reader):
+    # Returns None once the client has closed the connection
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.IncompleteReadError:
+        return None
+    except asyncio.LimitOverrunError:
+        raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, 'Request headers too large.')
+
+    lines = head.decode('latin-1').split('\r\n')
+    try:
+        method, path, version = lines[0].split(' ')
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, 'Malformed request line.')
+
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+    # Bodies are only read by Content-Length; refuse chunked uploads rather than drop them
+    if 'transfer-encoding' in headers:
+        raise HTTPError(HTTPStatus.LENGTH_REQUIRED, 'Chunked bodies are not supported, send Content-Length.')
+
+    try:
+        length = int(headers.get('content-length', 0))
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, 'Invalid Content-Length.')
+    if length < 0 or length > MAX_BODY_SIZE:
+        raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, 'Request body too large.')
+    try:
+        body = await reader.readexactly(length) if length else b''
+    except asyncio.IncompleteReadError:
+        return None
+
+    connection = headers.get('connection', '').lower()
+    keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+    return method, path.split('?', 1)[0], body, keep_alive
+
+
+def write_response(stream, status, body, keep_alive):
+    data = json.dumps(body).encode()
+    stream.write(
+        f'HTTP/1.1 {status.value} {status.phrase}\r\n'
+        f'Content-Type: application/json\r\n'
+        f'Content-Length: {len(data)}\r\n'
+        f'Connection: {"keep-alive" if keep_alive else "close"}\r\n'
+        f'\r\n'.encode() + data)
+
+
+async def handle_connection(writer, reader, stream):
+    try:
+        while True:
+            keep_alive = False
+            try:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, path, body, keep_alive = request
+                try:
+                    payload = json.loads(body or b'{}')
+                except ValueError:
+                    raise HTTPError(HTTPStatus.BAD_REQUEST, 'Body must be valid JSON.')
+                if not isinstance(payload, dict):
+                    raise HTTPError(HTTPStatus.BAD_REQUEST, 'Body must be a JSON object.')
+                status, result = await dispatch(writer, method, path, payload)
+            except HTTPError as error:
+                status, result = error.status, {'error': error.message}
+            except ValueError as error:
+                status, result = HTTPStatus.BAD_REQUEST, {'error': str(error)}
+            except NotFound as error:
+                status, result = HTTPStatus.NOT_FOUND, {'error': str(error)}
+            except (ConnectionError, asyncio.IncompleteReadError):
+                # The client went away; there is nobody left to answer
+                raise
+            except Exception:
+                # Never leave a request without a response
+                logging.exception('Unhandled error while serving %s', stream.get_extra_info('peername'))
+                status, result = HTTPStatus.INTERNAL_SERVER_ERROR, {'error': 'Internal server error.'}
+
+            write_response(stream, status, result, keep_alive)
+            await stream.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        stream.close()
+
+
+async def serve(host, port, db_path):
+    writer = BatchWriter(db_path)
+    await writer.start()
+    server = await asyncio.start_server(
+        lambda reader, stream: handle_connection(writer, reader, stream), host, port, backlog=1024)
+    print(f'Order intake API listening on http://{host}:{port}')
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await writer.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Headless order intake API for the laundry pickup app.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--db', default=pickup_service.DB_PATH, help='SQLite database shared with the Streamlit app')
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.db))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+import math
+import re
+import sqlite3
+from datetime import datetime
+
+# Default database shared by the Streamlit app and the order intake API
+DB_PATH = 'pickup_laundary_data.db'
+
+STATUSES = ['Pending', 'Completed']
+
+# Largest value an SQLite INTEGER column can hold
+MAX_ID = 2 ** 63 - 1
+
+EMAIL_PATTERN = re.compile(r"[^@]+@[^@]+\.[^@]+")
+
+
+# Open a connection and make sure the schema exists
+def connect(path=DB_PATH, check_same_thread=True):
+    conn = sqlite3.connect(path, check_same_thread=check_same_thread)
+    # WAL lets the Streamlit pages read while the API is writing, and the
+    # busy timeout makes either side wait for the other's write lock
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA busy_timeout=5000')
+    create_tables(conn.cursor())
+    conn.commit()
+    return conn
+
+
+def create_tables(c):
+    # Create pickup_data table if it doesn't exist
+    c.execute('''CREATE TABLE IF NOT EXISTS pickup_laundary_data (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    Name TEXT,
+                    Phone TEXT,
+                    Email TEXT,
+                    Pickup_Date TEXT,
+                    Pickup_Time TEXT,
+                    Status TEXT,
+                    Address TEXT,
+                    City TEXT,
+                    Postal_Code TEXT
+                )''')
+
+    c.execute('''CREATE TABLE IF NOT EXISTS order_items (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    Pickup_ID INTEGER,
+                    Item_Name TEXT,
+                    Item_Price REAL,
+                    FOREIGN KEY (Pickup_ID) REFERENCES pickup_laundary_data (id) ON DELETE CASCADE
+                )''')
+
+    # Create the users table with the updated schema
+    c.execute('''CREATE TABLE IF NOT EXISTS  users (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    Username TEXT,
+                    Password TEXT,
+                    Email TEXT,
+                    Date TEXT
+                )''')
+
+    # Create ledger table if it doesn't exist
+    c.execute('''CREATE TABLE IF NOT EXISTS ledger (
+                    ID INTEGER PRIMARY KEY AUTOINCREMENT,
+                    Customer_ID INTEGER,
+                    Date TEXT,
+                    Description TEXT,
+                    Amount REAL,
+                    FOREIGN KEY (Customer_ID) REFERENCES pickup_laundary_data (id) ON DELETE CASCADE
+                )''')
+
+
+# Write operations
+#
+# These do not commit: the caller owns the transaction, so the Streamlit
+# pages commit after each action and the API commits a whole batch at once.
+
+def create_pickup(c, name, phone, email, pickup_date, pickup_time, status, address, city, postal_code):
+    # Insert pickup data into the database and return the new ID
+    c.execute(
+        "INSERT INTO pickup_laundary_data (Name, Phone, Email, Pickup_Date, Pickup_Time, Status, Address, City, Postal_Code) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (name, phone, email, pickup_date, pickup_time, status, address, city, postal_code))
+    return c.lastrowid
+
+
+def pickup_exists(c, pickup_id):
+    c.execute("SELECT 1 FROM pickup_laundary_data WHERE ID=?", (pickup_id,))
+    return c.fetchone() is not None
+
+
+def add_items(c, pickup_id, items):
+    # Insert (name, price) pairs for an existing pickup
+    c.executemany("INSERT INTO order_items (Pickup_ID, Item_Name,Item_Price) VALUES (?, ?,?)",
+                  [(pickup_id, item_name, item_price) for item_name, item_price in items])
+
+
+def add_ledger_entry(c, customer_id, date, description, amount):
+    # Insert the new ledger entry and return its ID
+    c.execute("INSERT INTO ledger (Customer_ID, Date, Description, Amount) VALUES (?, ?, ?, ?)",
+              (customer_id, date, description, amount))
+    return c.lastrowid
+
+
+def update_status(c, pickup_id, status):
+    # Returns False if the order does not exist or already has this status.
+    # Checking first means no write transaction is opened when nothing changes.
+    c.execute("SELECT Status FROM pickup_laundary_data WHERE ID=?", (pickup_id,))
+    row = c.fetchone()
+    if row is None or row[0] == status:
+        return False
+    c.execute("UPDATE pickup_laundary_data SET Status=? WHERE ID=?", (status, pickup_id))
+    return True
+
+
+# Split the comma-separated item fields from the admin form into pairs
+def parse_items(item_names, item_prices):
+    item_names_list = item_names.split(',')
+    item_prices_list = item_prices.split(',')
+    return [(item_name.strip(), item_price.strip())
+            for item_name, item_price in zip(item_names_list, item_prices_list)]
+
+
+# Payload validation
+#
+# Each validator takes a decoded JSON object and returns the cleaned values,
+# raising ValueError with a message suitable for the API client.
+
+def _require_text(payload, key, required=True):
+    value = payload.get(key, '')
+    if value is None:
+        value = ''
+    if not isinstance(value, str):
+        raise ValueError(f'{key} must be a string')
+    value = value.strip()
+    if required and not value:
+        raise ValueError(f'{key} is required')
+    return value
+
+
+def _require_id(payload, key):
+    value = payload.get(key)
+    if isinstance(value, bool) or not isinstance(value, int) or not 0 < value <= MAX_ID:
+        raise ValueError(f'{key} must be a positive integer no larger than {MAX_ID}')
+    return value
+
+
+def _require_number(value, key):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f'{key} must be a number')
+    try:
+        value = float(value)
+    except OverflowError:
+        raise ValueError(f'{key} is too large') from None
+    if not math.isfinite(value):
+        raise ValueError(f'{key} must be a number')
+    return value
+
+
+def _require_date(payload, key):
+    value = _require_text(payload, key)
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').strftime('%Y-%m-%d')
+    except ValueError:
+        raise ValueError(f'{key} must be a date in YYYY-MM-DD format') from None
+
+
+def _require_time(payload, key):
+    value = _require_text(payload, key)
+    for time_format in ('%H:%M:%S', '%H:%M'):
+        try:
+            return datetime.strptime(value, time_format).strftime('%H:%M:%S')
+        except ValueError:
+            pass
+    raise ValueError(f'{key} must be a time in HH:MM or HH:MM:SS format')
+
+
+def validate_status(payload):
+    status = payload.get('status')
+    if status not in STATUSES:
+        raise ValueError(f'status must be one of {", ".join(STATUSES)}')
+    return status
+
+
+def validate_items(payload, required=True):
+    items = payload.get('items', [])
+    if not isinstance(items, list):
+        raise ValueError('items must be a list')
+    if required and not items:
+        raise ValueError('items must not be empty')
+    cleaned = []
+    for item in items:
+        if not isinstance(item, dict):
+            raise ValueError('each item must be an object with name and price')
+        price = _require_number(item.get('price'), 'item price')
+        if price < 0:
+            raise ValueError('item price must not be negative')
+        cleaned.append((_require_text(item, 'name'), price))
+    return cleaned
+
+
+def validate_pickup(payload):
+    email = _require_text(payload, 'email', required=False)
+    if email and not EMAIL_PATTERN.match(email):
+        raise ValueError('email is not a valid email address')
+    status = payload.get('status', 'Pending')
+    if status not in STATUSES:
+        raise ValueError(f'status must be one of {", ".join(STATUSES)}')
+    return {
+        'name': _require_text(payload, 'name'),
+        'phone': _require_text(payload, 'phone'),
+        'email': email,
+        'pickup_date': _require_date(payload, 'pickup_date'),
+        'pickup_time': _require_time(payload, 'pickup_time'),
+        'status': status,
+        'address': _require_text(payload, 'address', required=False),
+        'city': _require_text(payload, 'city', required=False),
+        'postal_code': _require_text(payload, 'postal_code', required=False),
+    }
+
+
+def validate_ledger_entry(payload):
+    return {
+        'customer_id': _require_id(payload, 'customer_id'),
+        'date': _require_date(payload, 'date'),
+        'description': _require_text(payload, 'description'),
+        'amount': _require_number(payload.get('amount'), 'amount'),
+    }
@@ -0,0 +1,212 @@
+import asyncio
+import json
+import logging
+import socket
+import sqlite3
+
+import pytest
+
+import pickup_api
+import pickup_service
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'pickup.db')
+
+
+def fetch_all(db_path, query):
+    conn = pickup_service.connect(db_path)
+    try:
+        return conn.execute(query).fetchall()
+    finally:
+        conn.close()
+
+
+def failing_operation(c):
+    c.execute("INSERT INTO ledger (Customer_ID, Date, Description, Amount) VALUES (1, '2023-06-01', 'x', 1)")
+    raise pickup_api.NotFound('Pickup not found.')
+
+
+def test_write_batch_rolls_back_only_the_failing_operation(db_path):
+    writer = pickup_api.BatchWriter(db_path)
+    writer.conn = writer._connect()
+    pickup = pickup_service.validate_pickup(
+        {'name': 'A', 'phone': '1', 'pickup_date': '2023-06-01', 'pickup_time': '10:00'})
+
+    outcomes = writer._write_batch([
+        pickup_api.create_pickup_operation(pickup, [('Shirt', 3.0)]),
+        failing_operation,
+        pickup_api.create_pickup_operation(pickup, []),
+    ])
+    writer.conn.close()
+
+    assert outcomes[0] == ({'id': 1}, None)
+    assert outcomes[1][0] is None and isinstance(outcomes[1][1], pickup_api.NotFound)
+    assert outcomes[2] == ({'id': 2}, None)
+    assert fetch_all(db_path, 'SELECT id FROM pickup_laundary_data') == [(1,), (2,)]
+    assert fetch_all(db_path, 'SELECT Pickup_ID, Item_Name FROM order_items') == [(1, 'Shirt')]
+    assert fetch_all(db_path, 'SELECT * FROM ledger') == []
+
+
+def test_batch_failure_is_retryable_but_operation_failure_is_not(db_path):
+    def integrity_error(c):
+        raise sqlite3.IntegrityError('constraint failed')
+
+    async def scenario():
+        writer = pickup_api.BatchWriter(db_path)
+        await writer.start()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(writer.executor, writer.conn.execute, 'PRAGMA busy_timeout=0')
+        try:
+            with pytest.raises(sqlite3.IntegrityError):
+                await writer.submit(integrity_error)
+
+            # Another connection holding the write lock fails the whole batch
+            other = pickup_service.connect(db_path)
+            other.execute('BEGIN IMMEDIATE')
+            try:
+                with pytest.raises(pickup_api.HTTPError) as error:
+                    await writer.submit(integrity_error)
+            finally:
+                other.rollback()
+                other.close()
+            return error.value
+        finally:
+            await writer.stop()
+
+    error = asyncio.run(scenario())
+
+    assert error.status == 503
+
+
+def test_operation_database_error_is_logged_as_server_error(db_path, caplog, monkeypatch):
+    def integrity_error(c):
+        raise sqlite3.IntegrityError('constraint failed')
+
+    monkeypatch.setattr(pickup_api, 'create_pickup_operation', lambda pickup, items: integrity_error)
+
+    async def scenario():
+        port, task = await start_server(db_path)
+        try:
+            return await request(port, 'POST', '/pickups', {
+                'name': 'A', 'phone': '1', 'pickup_date': '2023-06-01', 'pickup_time': '10:00'})
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    status, body = asyncio.run(scenario())
+
+    assert status == 500
+    assert body == {'error': 'Internal server error.'}
+    assert [record for record in caplog.records if record.levelno >= logging.ERROR]
+
+
+def test_submit_refuses_when_queue_is_full(db_path):
+    async def scenario():
+        writer = pickup_api.BatchWriter(db_path, max_queue_size=1)
+        writer.queue.put_nowait((failing_operation, None))
+        with pytest.raises(pickup_api.HTTPError) as error:
+            await writer.submit(failing_operation)
+        return error.value
+
+    error = asyncio.run(scenario())
+
+    assert error.status == 503
+    assert error.message == 'Too many pending orders, please retry.'
+
+
+async def request(port, method, path, body=None, headers=None):
+    reader, stream = await asyncio.open_connection('127.0.0.1', port)
+    data = body if isinstance(body, bytes) else json.dumps(body).encode() if body is not None else b''
+    head = f'{method} {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n'
+    for name, value in (headers or {'Content-Length': str(len(data))}).items():
+        head += f'{name}: {value}\r\n'
+    stream.write(head.encode() + b'\r\n' + data)
+    response = await reader.read()
+    stream.close()
+    status_line, _, rest = response.partition(b'\r\n')
+    return int(status_line.split(b' ')[1]), json.loads(rest.partition(b'\r\n\r\n')[2])
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+async def start_server(db_path):
+    port = free_port()
+    task = asyncio.create_task(pickup_api.serve('127.0.0.1', port, db_path))
+    for _ in range(100):
+        try:
+            _, stream = await asyncio.open_connection('127.0.0.1', port)
+            stream.close()
+            return port, task
+        except OSError:
+            await asyncio.sleep(0.02)
+    raise RuntimeError('server did not start')
+
+
+def test_serve_end_to_end(db_path):
+    async def scenario():
+        port, task = await start_server(db_path)
+        try:
+            results = [
+                await request(port, 'POST', '/pickups', {
+                    'name': 'A', 'phone': '1', 'pickup_date': '2023-06-01', 'pickup_time': '10:00',
+                    'items': [{'name': 'Shirt', 'price': 3.5}]}),
+                await request(port, 'POST', '/pickups', {'name': 'A'}),
+                await request(port, 'POST', '/pickups/1/items', {'items': [{'name': 'Pants', 'price': 5}]}),
+                await request(port, 'POST', '/pickups/2/items', {'items': [{'name': 'Pants', 'price': 5}]}),
+                await request(port, 'POST', '/pickups/99999999999999999999999/items',
+                              {'items': [{'name': 'Pants', 'price': 5}]}),
+                await request(port, 'POST', '/ledger',
+                              {'customer_id': 1, 'date': '2023-06-01', 'description': 'Wash', 'amount': 8.5}),
+                await request(port, 'PATCH', '/pickups/1/status', {'status': 'Completed'}),
+                await request(port, 'PATCH', '/pickups/1/status', {'status': 'Completed'}),
+                await request(port, 'POST', '/ledger', b'not json'),
+                await request(port, 'POST', '/pickups', b'5\r\n{"a":1}\r\n0\r\n\r\n',
+                              headers={'Transfer-Encoding': 'chunked'}),
+                await request(port, 'GET', '/nope'),
+            ]
+            # Concurrent submissions are coalesced into batches and all succeed
+            concurrent = await asyncio.gather(*(request(port, 'POST', '/pickups', {
+                'name': f'C{i}', 'phone': '1', 'pickup_date': '2023-06-01', 'pickup_time': '10:00'})
+                for i in range(50)))
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        return results, concurrent
+
+    results, concurrent = asyncio.run(scenario())
+
+    assert [status for status, _ in results] == [201, 400, 201, 404, 404, 201, 200, 200, 400, 411, 404]
+    assert results[0][1] == {'id': 1}
+    assert results[1][1] == {'error': 'phone is required'}
+    assert results[6][1]['updated'] is True
+    assert results[7][1]['updated'] is False
+    assert {status for status, _ in concurrent} == {201}
+    assert len({body['id'] for _, body in concurrent}) == 50
+    assert fetch_all(db_path, 'SELECT Item_Name FROM order_items WHERE Pickup_ID=1') == [('Shirt',), ('Pants',)]
+    assert fetch_all(db_path, 'SELECT Status FROM pickup_laundary_data WHERE ID=1') == [('Completed',)]
+
+
+def test_truncated_body_closes_connection_without_logging_an_error(db_path, caplog):
+    async def scenario():
+        port, task = await start_server(db_path)
+        try:
+            reader, stream = await asyncio.open_connection('127.0.0.1', port)
+            stream.write(b'POST /pickups HTTP/1.1\r\nHost: localhost\r\nContent-Length: 100\r\n\r\n{"na')
+            await stream.drain()
+            stream.close()
+            await stream.wait_closed()
+            # Give the server a moment to notice the closed connection
+            await asyncio.sleep(0.1)
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(scenario())
+
+    assert not [record for record in caplog.records if record.levelno >= logging.ERROR]
@@ -0,0 +1,121 @@
+import pytest
+
+import pickup_service
+
+
+PICKUP = {
+    'name': ' Jane Doe ',
+    'phone': '9876543210',
+    'email': 'jane@example.com',
+    'pickup_date': '2023-06-02',
+    'pickup_time': '14:30',
+    'address': '1 Main St',
+    'city': 'Springfield',
+    'postal_code': '12345',
+}
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = pickup_service.connect(str(tmp_path / 'pickup.db'))
+    yield conn
+    conn.close()
+
+
+def test_validate_pickup_cleans_values():
+    pickup = pickup_service.validate_pickup(PICKUP)
+    assert pickup['name'] == 'Jane Doe'
+    assert pickup['pickup_time'] == '14:30:00'
+    assert pickup['status'] == 'Pending'
+
+
+def test_validate_pickup_optional_fields_default_to_empty():
+    pickup = pickup_service.validate_pickup(
+        {'name': 'A', 'phone': '1', 'pickup_date': '2023-06-02', 'pickup_time': '10:00:15'})
+    assert pickup['email'] == pickup['address'] == pickup['city'] == pickup['postal_code'] == ''
+    assert pickup['pickup_time'] == '10:00:15'
+
+
+@pytest.mark.parametrize('field, value, message', [
+    ('name', '', 'name is required'),
+    ('phone', 12345, 'phone must be a string'),
+    ('email', 'not-an-email', 'email is not a valid'),
+    ('pickup_date', '2023-13-01', 'pickup_date must be a date'),
+    ('pickup_time', '25:00', 'pickup_time must be a time'),
+    ('status', 'Lost', 'status must be one of'),
+])
+def test_validate_pickup_rejects_bad_fields(field, value, message):
+    with pytest.raises(ValueError, match=message):
+        pickup_service.validate_pickup(dict(PICKUP, **{field: value}))
+
+
+def test_validate_items():
+    items = pickup_service.validate_items({'items': [{'name': 'Shirt', 'price': 3}, {'name': 'Pants', 'price': 4.5}]})
+    assert items == [('Shirt', 3.0), ('Pants', 4.5)]
+    assert pickup_service.validate_items({}, required=False) == []
+
+
+@pytest.mark.parametrize('items, message', [
+    ([], 'items must not be empty'),
+    ('Shirt', 'items must be a list'),
+    (['Shirt'], 'each item must be an object'),
+    ([{'name': 'Shirt', 'price': '3'}], 'item price must be a number'),
+    ([{'name': 'Shirt', 'price': True}], 'item price must be a number'),
+    ([{'name': 'Shirt', 'price': -1}], 'item price must not be negative'),
+    ([{'name': 'Shirt', 'price': 10 ** 400}], 'item price is too large'),
+    ([{'name': '', 'price': 1}], 'name is required'),
+])
+def test_validate_items_rejects_bad_items(items, message):
+    with pytest.raises(ValueError, match=message):
+        pickup_service.validate_items({'items': items})
+
+
+def test_validate_ledger_entry():
+    entry = pickup_service.validate_ledger_entry(
+        {'customer_id': 1, 'date': '2023-06-01', 'description': 'Wash', 'amount': 8})
+    assert entry == {'customer_id': 1, 'date': '2023-06-01', 'description': 'Wash', 'amount': 8.0}
+
+
+@pytest.mark.parametrize('customer_id', [0, -1, '1', True, pickup_service.MAX_ID + 1])
+def test_validate_ledger_entry_rejects_bad_customer_id(customer_id):
+    with pytest.raises(ValueError, match='customer_id must be a positive integer'):
+        pickup_service.validate_ledger_entry(
+            {'customer_id': customer_id, 'date': '2023-06-01', 'description': 'Wash', 'amount': 8})
+
+
+def test_validate_ledger_entry_rejects_non_finite_amount():
+    with pytest.raises(ValueError, match='amount must be a number'):
+        pickup_service.validate_ledger_entry(
+            {'customer_id': 1, 'date': '2023-06-01', 'description': 'Wash', 'amount': float('nan')})
+
+
+def test_validate_status():
+    assert pickup_service.validate_status({'status': 'Completed'}) == 'Completed'
+    with pytest.raises(ValueError):
+        pickup_service.validate_status({})
+
+
+def test_parse_items():
+    assert pickup_service.parse_items('Shirt, Pants', '3, 4.5') == [('Shirt', '3'), ('Pants', '4.5')]
+
+
+def test_update_status_does_not_hold_write_lock_when_unchanged(conn, tmp_path):
+    c = conn.cursor()
+    pickup_id = pickup_service.create_pickup(c, 'A', '1', '', '2023-06-01', '10:00:00', 'Completed', '', '', '')
+    conn.commit()
+
+    assert not pickup_service.update_status(c, pickup_id, 'Completed')
+    assert not pickup_service.update_status(c, pickup_id + 1, 'Completed')
+    assert not conn.in_transaction
+
+    # Another writer, such as the API, can still take the write lock
+    other = pickup_service.connect(str(tmp_path / 'pickup.db'))
+    other.execute('PRAGMA busy_timeout=0')
+    other.execute('BEGIN IMMEDIATE')
+    other.rollback()
+    other.close()
+
+    assert pickup_service.update_status(c, pickup_id, 'Pending')
+    conn.commit()
+    c.execute('SELECT Status FROM pickup_laundary_data WHERE ID=?', (pickup_id,))
+    assert c.fetchone() == ('Pending',)